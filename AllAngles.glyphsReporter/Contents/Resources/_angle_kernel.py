@@ -0,0 +1,64 @@
+# encoding: utf-8
+from __future__ import division, print_function, unicode_literals
+
+###########################################################################################################
+#
+# Scalar geometry kernel for the AllAngles reporter.
+#
+# Computes the angle and indicator geometry for a single segment. When Numba is
+# available the kernel is JIT-compiled to native code (and cached on disk across
+# launches); otherwise the very same function runs as plain Python, so the
+# plugin behaves identically either way.
+#
+###########################################################################################################
+
+from math import atan2, hypot, degrees
+
+try:
+	from numba import njit
+except ImportError:
+	njit = None
+
+
+def compute_indicator_geometry(x1, y1, x2, y2, offset_scale):
+	"""Given the endpoints of a segment and the offset scale for the current
+	view, returns (theta, quadrant, x_mid, y_mid, x_mid_offset,
+	y_mid_offset): the angle of the segment, the 45 degree sector index of
+	its direction (for label alignment), and the two endpoints of its
+	indicator line.
+
+	theta follows the plugin's angle convention — degrees(atan2(dx, dy))
+	clamped into [0, 180) — with exact fast paths for axis-aligned and
+	45 degree segments. The quadrant is derived from the same atan2 result
+	(the direction bucketed as int((202.5 - raw) // 45) % 8), so the angle
+	and the alignment cost a single transcendental between them.
+	"""
+	dx = x2 - x1
+	dy = y2 - y1
+	if dx == 0.0:
+		theta = 0.0
+		quadrant = 4 if dy > 0.0 else 0
+	elif dy == 0.0:
+		theta = 90.0
+		quadrant = 2 if dx > 0.0 else 6
+	elif abs(dx) == abs(dy):
+		if (dx > 0.0) == (dy > 0.0):
+			theta = 45.0
+			quadrant = 3 if dx > 0.0 else 7
+		else:
+			theta = 135.0
+			quadrant = 1 if dx > 0.0 else 5
+	else:
+		# atan2 is already in (-180, 180], so a conditional add is enough to
+		# clamp into [0, 180) — no need for a full float modulo.
+		raw = degrees(atan2(dx, dy))
+		theta = raw + 180.0 if raw < 0.0 else raw
+		quadrant = int((202.5 - raw) // 45.0) % 8
+	x_mid = x1 + 0.5 * dx
+	y_mid = y1 + 0.5 * dy
+	k = offset_scale / hypot(dx, dy)
+	return theta, quadrant, x_mid, y_mid, x_mid + dy * k, y_mid - dx * k
+
+
+if njit is not None:
+	compute_indicator_geometry = njit(cache=True)(compute_indicator_geometry)
@@ -15,99 +15,78 @@ from __future__ import division, print_function, unicode_literals
 #
 ###########################################################################################################
 
-from math import atan2, sqrt, pi, degrees, cos, sin
+from array import array
+from functools import lru_cache
+
+from _angle_kernel import compute_indicator_geometry
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
 import objc
-from Cocoa import NSColor, NSPoint, NSBezierPath, NSBundle
-from GlyphsApp import Glyphs, GSFont
+from Cocoa import NSColor, NSPoint, NSGraphicsContext
+from Quartz import (
+	CGContextAddLineToPoint,
+	CGContextMoveToPoint,
+	CGContextSetLineWidth,
+	CGContextSetRGBStrokeColor,
+	CGContextStrokePath,
+)
+from GlyphsApp import Glyphs
 from GlyphsApp.plugins import ReporterPlugin
 
 # =======
 # Constants:
-#  - Colors to use when rendering line and handle indicators.
+#  - Colors to use when rendering line and handle indicators. These are
+#    allocated once for the life of the plugin; nothing on the drawing path
+#    should create NSColor objects (or call .set()) per segment.
 #  - Number of significant digits beyond the decimal to account for
 #    When printing angles.
 # =======
 
-LINE_COLOR = NSColor.colorWithCalibratedRed_green_blue_alpha_(56 / 256, 217 / 256, 137 / 256, 1)
-HANDLE_COLOR = NSColor.colorWithCalibratedRed_green_blue_alpha_(217 / 256, 56 / 256, 107 / 256, 1)
+LINE_RGBA = (56 / 256, 217 / 256, 137 / 256, 1)
+HANDLE_RGBA = (217 / 256, 56 / 256, 107 / 256, 1)
+LINE_COLOR = NSColor.colorWithCalibratedRed_green_blue_alpha_(*LINE_RGBA)
+HANDLE_COLOR = NSColor.colorWithCalibratedRed_green_blue_alpha_(*HANDLE_RGBA)
 PRECISION = 1
 
+# Precompiled format string for the angle labels, so the inner loop does a
+# single C-side float format instead of crossing the ObjC bridge per segment.
+ANGLE_FMT = "%%.%df°" % PRECISION
+
 
 # =======
-# Mini 2d vector manipulation library. All methods take vectors 2d vectors
-# as a list of components, and return components (or angles in degrees).
+# Geometry helpers. The per-segment angle/indicator math (including the label
+# alignment sector) lives in _angle_kernel so it can be JIT-compiled when
+# Numba is available; QUADRANTS maps the kernel's sector index to the text
+# alignment, with "topcenter" facing straight up.
 # =======
-def get_unit_vector(x, y):
-	"""Given 2d vector components x and y as floats,
-	returns the unit vector in the same direction
-	as the given vector (x, y).
-	"""
-	length = sqrt(x**2 + y**2)
-	return x / length, y / length
+QUADRANTS = ("right", "topright", "topcenter", "topleft", "left", "bottomleft", "bottomcenter", "bottomright")
 
 
-def get_vector_angle(x, y):
-	"""Given 2d vector components x and y as floats,
-	returns the degrees from the horizontal of that vector.
-	The return value is clamped into the range [0, 180), so that
-	angles in the bottom two quadrants of the unit circle are
-	translated into the top two.
-
-	example: an angle of 240 degrees is clamped to 60 degrees.
+@lru_cache(maxsize=512)
+def format_angle_label(theta):
+	"""Memoized angle label formatting. Glyph outlines reuse a small set of
+	angles (stems, 45 degree diagonals, a design's recurring slants), so the
+	formatted string for a given angle is shared instead of reallocated for
+	every segment on every repaint.
 	"""
-	x_norm, y_norm = get_unit_vector(x, y)
-	return degrees(atan2(x_norm, y_norm)) % 180
+	return ANGLE_FMT % theta
 
 
-def get_rotated_vector(x, y, angle=3 * pi / 2):
-	"""Given 2d vector components x and y as floats,
-	rotate that vector by "angle" degrees, and return
-	the components of the rotated vector.
+@lru_cache(maxsize=4096)
+def get_indicator_data(x1, y1, x2, y2, offset_scale):
+	"""Memoized per-segment indicator data. Between repaints (panning,
+	selection flicker) the same segments recur with identical coordinates,
+	so the formatted label, the indicator line endpoints, and the label
+	alignment can all be served from a dict lookup keyed on the segment's
+	primitive coordinates plus the current offset scale.
 	"""
-	return cos(angle) * x - sin(angle) * y, sin(angle) * x + cos(angle) * y
-
+	theta, quadrant, x_mid, y_mid, x_mid_offset, y_mid_offset = compute_indicator_geometry(x1, y1, x2, y2, offset_scale)
+	return format_angle_label(theta), x_mid, y_mid, x_mid_offset, y_mid_offset, QUADRANTS[quadrant]
 
-def get_intermediate_from_points(x1, y1, x2, y2, t=0.5):
-	"""Given a line defined by two vectors as component floats,
-	return a point interpolated along the line between the two vectors,
-	as given by a parameter "t".
-	"""
-	return t * (x2 - x1) + x1, t * (y2 - y1) + y1
-
-
-def determine_quadrant(x1, y1, x2, y2):
-	# Calculate the differences
-	dx = x2 - x1
-	dy = y2 - y1
-
-	# Calculate the angle in degrees
-	angle = atan2(dy, dx) * 180 / pi
-	angle += 90
-	# Normalize the angle to [0, 360)
-	if angle < 0:
-		angle += 360
-
-	# Determine the quadrant
-	if angle >= 337.5 or angle < 22.5:
-		return "right"
-	elif angle >= 22.5 and angle < 67.5:
-		return "topright"
-	elif angle >= 67.5 and angle < 112.5:
-		return "topcenter"
-	elif angle >= 112.5 and angle < 157.5:
-		return "topleft"
-	elif angle >= 157.5 and angle < 202.5:
-		return "left"
-	elif angle >= 202.5 and angle < 247.5:
-		return "bottomleft"
-	elif angle >= 247.5 and angle < 292.5:
-		return "bottomcenter"
-	else:
-		return "bottomright"
-
-
-bundle = NSBundle.bundleForClass_(GSFont)
-objc.loadBundleFunctions(bundle, globals(), [("GSFloatToStringWithPrecisionLocalized", b'@di')])
 
 Glyphs.registerDefault("AllAnglesShowLineAngles", True)
 
@@ -154,45 +133,152 @@ class AllAngles(ReporterPlugin):
 		"""
 		show_lines = self.show_lines
 		show_handles = self.show_handles
-		for path in layer.paths:
-			for segment in path.segments:
-				if len(segment) == 2 and show_lines:
-					self.render_indicator_for_line(segment[0], segment[1], draw_color=LINE_COLOR)
-				elif len(segment) == 4 and show_handles:
-					self.render_indicator_for_line(segment[0], segment[1], draw_color=HANDLE_COLOR)
-					self.render_indicator_for_line(segment[2], segment[3], draw_color=HANDLE_COLOR)
+		# The scale only changes between repaints, so fetch it (and the derived
+		# quantities) once per call rather than crossing the ObjC bridge for
+		# every segment.
+		inv_scale = 1.0 / self.getScale()
+		offset_scale = 14 * inv_scale
+		line_width = 0.8 * inv_scale
+		# Only segments whose indicator would actually land inside the
+		# visible viewport need to be rendered; everything else is culled
+		# against the view bounds (in layer coordinates) computed here once.
+		bounds = self.get_visible_bounds(inv_scale)
+		if np is not None:
+			# Batch-read every endpoint into flat double buffers up front, so
+			# the math phase works on contiguous memory instead of per-segment
+			# tuples of NSPoint proxies.
+			line_coords = array('d')
+			handle_coords = array('d')
+			line_append = line_coords.append
+			handle_append = handle_coords.append
+			for path in layer.paths:
+				for segment in path.segments:
+					if len(segment) == 2 and show_lines:
+						p1, p2 = segment[0], segment[1]
+						line_append(p1.x)
+						line_append(p1.y)
+						line_append(p2.x)
+						line_append(p2.y)
+					elif len(segment) == 4 and show_handles:
+						p1, p2, p3, p4 = segment[0], segment[1], segment[2], segment[3]
+						handle_append(p1.x)
+						handle_append(p1.y)
+						handle_append(p2.x)
+						handle_append(p2.y)
+						handle_append(p3.x)
+						handle_append(p3.y)
+						handle_append(p4.x)
+						handle_append(p4.y)
+			self.render_indicators_batched(line_coords, LINE_COLOR, LINE_RGBA, offset_scale, line_width, bounds)
+			self.render_indicators_batched(handle_coords, HANDLE_COLOR, HANDLE_RGBA, offset_scale, line_width, bounds)
+		else:
+			line_lines = []
+			handle_lines = []
+			# Pre-bind the hot lookups as locals, so the inner loop runs on
+			# LOAD_FAST instead of repeated attribute/global lookups.
+			render = self.render_indicator_for_line
+			line_color, handle_color = LINE_COLOR, HANDLE_COLOR
+			for path in layer.paths:
+				for segment in path.segments:
+					n = len(segment)
+					if n == 2 and show_lines:
+						render(segment[0], segment[1], line_color, offset_scale, line_lines, bounds)
+					elif n == 4 and show_handles:
+						render(segment[0], segment[1], handle_color, offset_scale, handle_lines, bounds)
+						render(segment[2], segment[3], handle_color, offset_scale, handle_lines, bounds)
+			self.stroke_indicator_lines(line_lines, LINE_RGBA, line_width)
+			self.stroke_indicator_lines(handle_lines, HANDLE_RGBA, line_width)
 
 	@objc.python_method
-	def render_indicator_for_line(self, p1, p2, draw_color=LINE_COLOR):
-		"""Given a segment from glyphs (a list of two NSPoints), draw an indicator
-		showing the angle of that segment with respect to the horizontal in the given "draw_color".
+	def render_indicators_batched(self, coords, draw_color, stroke_rgba, offset_scale, line_width, bounds=None):
+		"""Vectorized equivalent of render_indicator_for_line for a whole batch
+		of segments, given as a flat array.array('d') of endpoint coordinates
+		(x1, y1, x2, y2 per segment). All of the per-segment math is done in a
+		handful of NumPy array operations over contiguous buffers; the
+		remaining Python loop only issues the Cocoa drawing calls.
+		"""
+		if not coords:
+			return
+		pts = np.frombuffer(coords, dtype=np.float64).reshape(-1, 4)
+
+		dx = pts[:, 2] - pts[:, 0]
+		dy = pts[:, 3] - pts[:, 1]
+
+		# Degenerate segments with coincident endpoints have no angle; drop
+		# them before they can divide by a zero length below.
+		length = np.hypot(dx, dy)
+		valid = length > 0.0
+		if not valid.all():
+			pts, dx, dy, length = pts[valid], dx[valid], dy[valid], length[valid]
+
+		# One arctan2 pass serves both the displayed angle and the label
+		# alignment sector.
+		raw = np.degrees(np.arctan2(dx, dy))
+		theta = np.mod(raw, 180.0)
+		quadrants = (((202.5 - raw) // 45.0) % 8).astype(int)
+		x_mid = 0.5 * (pts[:, 0] + pts[:, 2])
+		y_mid = 0.5 * (pts[:, 1] + pts[:, 3])
+
+		# Cull indicators whose midpoint sits outside the visible viewport,
+		# so the (Cocoa-bound) draw loop only touches what is on screen.
+		if bounds is not None:
+			x_lo, y_lo, x_hi, y_hi = bounds
+			visible = (x_mid >= x_lo) & (x_mid <= x_hi) & (y_mid >= y_lo) & (y_mid <= y_hi)
+			if not visible.all():
+				dx, dy, length = dx[visible], dy[visible], length[visible]
+				theta, quadrants = theta[visible], quadrants[visible]
+				x_mid, y_mid = x_mid[visible], y_mid[visible]
+
+		# The indicator hangs off the midpoint along the segment's unit vector
+		# rotated by 3π/2; folding the normalization into the offset scale
+		# gives the offset directly as (dy, -dx) * (offset_scale / length).
+		k = offset_scale / length
+		x_mid_offset = x_mid + dy * k
+		y_mid_offset = y_mid - dx * k
+
+		draw_text = self.drawTextAtPoint
+		# tolist() unboxes the whole arrays once, so the loop below works on
+		# native floats: the formatting runs CPython's fixed-precision fast
+		# path, and no NumPy scalars are boxed per segment.
+		theta = theta.tolist()
+		if not theta:
+			return
+		quadrants = quadrants.tolist()
+		x_mid, y_mid = x_mid.tolist(), y_mid.tolist()
+		x_mid_offset, y_mid_offset = x_mid_offset.tolist(), y_mid_offset.tolist()
+		for i in range(len(theta)):
+			pretty_angle = format_angle_label(theta[i])
+			align = QUADRANTS[quadrants[i]]
+			draw_text(pretty_angle, NSPoint(x_mid_offset[i], y_mid_offset[i]), fontColor=draw_color, align=align)
+		self.stroke_indicator_lines(zip(x_mid, y_mid, x_mid_offset, y_mid_offset), stroke_rgba, line_width)
+
+	@objc.python_method
+	def render_indicator_for_line(self, p1, p2, draw_color, offset_scale, indicator_lines, bounds=None):
+		"""Given a segment from glyphs (a list of two NSPoints), draw the angle
+		label for that segment with respect to the horizontal in the given
+		"draw_color", and append its indicator line to "indicator_lines"
+		(stroked once per color at the end of foreground).
 		"""
 		# 1.0 Get the angle from the segment
 		x1, y1 = p1.x, p1.y
 		x2, y2 = p2.x, p2.y
 
-		dx, dy = x2 - x1, y2 - y1
-		theta = get_vector_angle(dx, dy)
+		# Degenerate segments with coincident endpoints have no angle; bail
+		# out before the kernel divides by a zero length.
+		if x1 == x2 and y1 == y2:
+			return
 
-		# 1.1 Prettyprint the Angle with the degree sign,
-		# to the desired precision
-		pretty_angle = GSFloatToStringWithPrecisionLocalized(theta, PRECISION) + "°"
+		# Cull indicators whose midpoint sits outside the visible viewport.
+		if bounds is not None and not (bounds[0] <= 0.5 * (x1 + x2) <= bounds[2] and bounds[1] <= 0.5 * (y1 + y2) <= bounds[3]):
+			return
 
-		# 2.0 Generate the off-curve endpoint of the indicator pointing from the
-		# Angle to the curve it describes.
-		offset_scale = 14 / self.getScale()
-		x_mid, y_mid = get_intermediate_from_points(x1, y1, x2, y2)
-		x_norm, y_norm = get_unit_vector(x2 - x1, y2 - y1)
-		x_orth, y_orth = get_rotated_vector(x_norm, y_norm)
-		x_mid_offset, y_mid_offset = x_mid + offset_scale * x_orth, y_mid + offset_scale * y_orth
+		# 1.1 The memoized helper returns the label, both endpoints of the
+		# indicator line, and the label alignment; on a cache hit all of the
+		# math (and the label formatting) is skipped entirely.
+		pretty_angle, x_mid, y_mid, x_mid_offset, y_mid_offset, align = get_indicator_data(x1, y1, x2, y2, offset_scale)
 
-		# 3.0 Generate the anchor for the text so that it's positioned more or less
-		# Appropriately relative to the indicator line.
-		align = determine_quadrant(x1, y1, x2, y2)
-
-		# 4.0 Draw everything to the canvas.
-		draw_color.set()
-		self.draw_indicator((x_mid, y_mid), (x_mid_offset, y_mid_offset))
+		# 2.0 Add the indicator line to the batch, and draw the label.
+		indicator_lines.append((x_mid, y_mid, x_mid_offset, y_mid_offset))
 		self.drawTextAtPoint(pretty_angle, NSPoint(x_mid_offset, y_mid_offset), fontColor=draw_color, align=align)
 
 	def toggleLines(self):
@@ -234,15 +320,41 @@ class AllAngles(ReporterPlugin):
 		Glyphs.boolDefaults["AllAnglesShowHandleAngles"] = value
 
 	@objc.python_method
-	def draw_indicator(self, start, end):
-		"""Given a starting point and and ending point as a list of floats,
-		Draws a line to the canvas from start to end.
+	def get_visible_bounds(self, inv_scale, margin=20):
+		"""Returns the visible rect of the Edit view in layer coordinates as
+		(x_lo, y_lo, x_hi, y_hi), padded by "margin" layer units so that
+		indicators straddling the edge still draw. Returns None when the view
+		is unavailable, in which case nothing is culled.
+		"""
+		try:
+			view = Glyphs.font.currentTab.graphicView()
+			rect = view.visibleRect()
+			origin = view.activePosition()
+			x_lo = (rect.origin.x - origin.x) * inv_scale - margin
+			y_lo = (rect.origin.y - origin.y) * inv_scale - margin
+			x_hi = x_lo + rect.size.width * inv_scale + 2 * margin
+			y_hi = y_lo + rect.size.height * inv_scale + 2 * margin
+			return x_lo, y_lo, x_hi, y_hi
+		except:
+			return None
+
+	@objc.python_method
+	def stroke_indicator_lines(self, lines, stroke_rgba, line_width):
+		"""Strokes all of the accumulated indicator lines for one color —
+		an iterable of (x1, y1, x2, y2) tuples — in a single draw call,
+		issuing the path primitives straight to the CGContext rather than
+		through an NSBezierPath object.
 		"""
-		linePath = NSBezierPath.bezierPath()
-		linePath.moveToPoint_(start)
-		linePath.lineToPoint_(end)
-		linePath.setLineWidth_(0.8 / self.getScale())
-		linePath.stroke()
+		if not lines:
+			return
+		ctx = NSGraphicsContext.currentContext().CGContext()
+		r, g, b, a = stroke_rgba
+		CGContextSetRGBStrokeColor(ctx, r, g, b, a)
+		CGContextSetLineWidth(ctx, line_width)
+		for x1, y1, x2, y2 in lines:
+			CGContextMoveToPoint(ctx, x1, y1)
+			CGContextAddLineToPoint(ctx, x2, y2)
+		CGContextStrokePath(ctx)
 
 	@objc.python_method
 	def __file__(self):